@@ -1 +1 @@
-from .simplepush import send, async_send, BadRequest, UnknownError, FeedbackActionError, FeedbackActionTimeout, FeedbackUnavailable
\ No newline at end of file
+from .simplepush import send, async_send, send_many, async_send_many, wait_feedback, close, async_close, configure, BadRequest, UnknownError, FeedbackActionError, FeedbackActionTimeout, FeedbackUnavailable
\ No newline at end of file
@@ -1,22 +1,69 @@
 """Library to interact with the Simplepush notification service."""
+import atexit
 import base64
+import functools
 import os
-from cryptography.hazmat.primitives import padding
+import random
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
 import hashlib
+import math
+import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import aiohttp
 import asyncio
 import time
-from typing import Dict
+import warnings
+from typing import AsyncGenerator, Dict, Tuple
+
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
 
 DEFAULT_TIMEOUT = 5
 
 SALT = '1789F0B8C4A051E5'
 
+_BACKEND = default_backend()
+
+_AES_BLOCK_BYTES = algorithms.AES.block_size // 8
+
+# Without CPU flags, AES-NI shows as CBC being well over twice as slow as CTR
+_AES_PROBE_SIZE = 64 * 1024
+_AES_PROBE_RATIO = 2
+
+_ENCODE = json.JSONEncoder(separators=(',', ':'), ensure_ascii=True).encode
+
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Feedback polling backs off exponentially from one second up to eight
+_FEEDBACK_POLL_BASE = 1
+_FEEDBACK_POLL_CAP = 8
+_FEEDBACK_POLL_JITTER = 0.25
+_FEEDBACK_RETRY_AFTER_MAX = 300
+
 SIMPLEPUSH_URL = 'https://simplepu.sh'
 
+_SEND_URL = SIMPLEPUSH_URL + '/send'
+
+_FEEDBACK_URL_FMT = SIMPLEPUSH_URL + '/1/feedback/{}'
+
+# Connection pool, timeout and retry settings, see configure()
+_settings = {'pool_size': 16, 'connect_timeout': DEFAULT_TIMEOUT, 'read_timeout': DEFAULT_TIMEOUT, 'retries': 2}
+
+# Pooled session so consecutive notifications reuse the same TCP/TLS connection
+_SESSION = requests.Session()
+_SESSION.headers.update(_JSON_HEADERS)
+
+# Pending feedback polls started by async_send
+_feedback_tasks = set()
+
+# Shared aiohttp sessions, one per event loop since a session can't cross loops
+_aio_sessions: Dict[int, Tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession, AsyncGenerator]] = {}
+
 class BadRequest(Exception):
     """Raised when API thinks that title or message are too long."""
     pass
@@ -38,6 +85,80 @@ class FeedbackUnavailable(Exception):
     pass
 
 
+def configure(pool_size=None, connect_timeout=None, read_timeout=None, retries=None):
+    """Tune connection pooling, timeouts and retries.
+
+    The pooled requests session picks up the settings immediately, shared
+    aiohttp sessions only once they are recreated (e.g. after async_close).
+    """
+    for name, value in (('pool_size', pool_size), ('connect_timeout', connect_timeout), ('read_timeout', read_timeout), ('retries', retries)):
+        if value is not None:
+            _settings[name] = value
+
+    # Sending is not idempotent: POST is only retried when the connection
+    # couldn't be established, read and status retries are limited to GET
+    retry = Retry(total=_settings['retries'], backoff_factor=0.2, status_forcelist=(429, 502, 503, 504), allowed_methods=frozenset({'GET'}), raise_on_status=False)
+
+    _SESSION.get_adapter('https://').close()
+    _SESSION.mount('https://', HTTPAdapter(pool_connections=_settings['pool_size'], pool_maxsize=_settings['pool_size'], max_retries=retry))
+
+configure()
+
+def _timeout():
+    """Return the (connect, read) timeout for requests."""
+    return (_settings['connect_timeout'], _settings['read_timeout'])
+
+def close():
+    """Close the pooled HTTP session."""
+    _SESSION.close()
+
+atexit.register(close)
+
+async def async_close():
+    """Close the shared aiohttp session of the running event loop.
+
+    asyncio.run does this on exit. Event loops driven by hand must await
+    this or loop.shutdown_asyncgens() before loop.close(), otherwise the
+    session's connections are left open.
+    """
+    entry = _aio_sessions.pop(id(asyncio.get_running_loop()), None)
+    if entry is not None:
+        await entry[2].aclose()
+
+async def _get_session():
+    """Return the shared aiohttp session for the running event loop."""
+    loop = asyncio.get_running_loop()
+    entry = _aio_sessions.get(id(loop))
+    if entry is not None and entry[0] is loop and not entry[1].closed:
+        return entry[1]
+
+    # Evict sessions of event loops that are gone, closing those whose loop
+    # never finalized its async generators
+    for loop_id, (other_loop, _, other_closer) in list(_aio_sessions.items()):
+        if other_loop.is_closed():
+            del _aio_sessions[loop_id]
+            await other_closer.aclose()
+
+    connector = aiohttp.TCPConnector(limit=_settings['pool_size'], ttl_dns_cache=300, keepalive_timeout=30)
+    timeout = aiohttp.ClientTimeout(sock_connect=_settings['connect_timeout'], total=_settings['read_timeout'])
+    session = aiohttp.ClientSession(connector=connector, timeout=timeout, raise_for_status=True)
+
+    # The loop finalizes pending async generators on shutdown (asyncio.run
+    # does so automatically), which closes the session with its loop
+    closer = _close_on_shutdown(session)
+    await closer.__anext__()
+
+    _aio_sessions[id(loop)] = (loop, session, closer)
+    return session
+
+async def _close_on_shutdown(session):
+    """Close the session once this generator is finalized."""
+    try:
+        yield
+    finally:
+        await session.close()
+
+
 def send(key, message, title=None, password=None, salt=None, attachments = None, event=None, actions=None, feedback_callback=None, feedback_callback_timeout=60, ignore_connection_errors=True):
     """Send a plain-text message."""
     if not key or not message:
@@ -54,11 +175,15 @@ def send(key, message, title=None, password=None, salt=None, attachments = None,
 
     payload, actions, actions_encrypted = _generate_payload(key, title, message, attachments, event, actions, password, salt)
 
-    r = requests.post(SIMPLEPUSH_URL + '/send', json=payload, timeout=DEFAULT_TIMEOUT)
+    r = _SESSION.post(_SEND_URL, data=_ENCODE(payload).encode(), timeout=_timeout())
     _handle_response(r, actions, actions_encrypted, feedback_callback, feedback_callback_timeout, ignore_connection_errors)
 
-async def async_send(key, message, title=None, password=None, salt=None, attachments=None, event=None, actions=None, feedback_callback=None, feedback_callback_timeout=60, ignore_connection_errors=True, aiohttp_session=None):
-    """Send a plain-text message."""
+async def async_send(key, message, title=None, password=None, salt=None, attachments=None, event=None, actions=None, feedback_callback=None, feedback_callback_timeout=60, ignore_connection_errors=True, aiohttp_session=None, wait_for_feedback=True):
+    """Send a plain-text message.
+
+    With wait_for_feedback=False the feedback callback is polled for in a
+    background task, which is returned instead of waited for.
+    """
     if not key or not message:
         raise ValueError("Key and message argument must be set")
 
@@ -73,31 +198,96 @@ async def async_send(key, message, title=None, password=None, salt=None, attachm
 
     payload, actions, actions_encrypted = _generate_payload(key, title, message, attachments, event, actions, password, salt)
     
-    if aiohttp_session:
-        async with aiohttp_session.post(SIMPLEPUSH_URL + '/send', json=payload) as resp:
-            return await _async_handle_response(await resp.json(), actions, actions_encrypted, feedback_callback, feedback_callback_timeout,ignore_connection_errors, aiohttp_session)
-    else:
-        async with aiohttp.ClientSession(raise_for_status=True) as session:
-            async with session.post(SIMPLEPUSH_URL + '/send', json=payload) as resp:
-                return await _async_handle_response(await resp.json(), actions, actions_encrypted, feedback_callback, feedback_callback_timeout, ignore_connection_errors, session)
+    session = aiohttp_session or await _get_session()
+    async with session.post(_SEND_URL, data=_ENCODE(payload).encode(), headers=_JSON_HEADERS) as resp:
+        json_response = _loads(await resp.read())
+
+    return await _async_handle_response(json_response, actions, actions_encrypted, feedback_callback, feedback_callback_timeout, ignore_connection_errors, session, wait_for_feedback)
+
+def send_many(items, concurrency=8):
+    """Send many messages over one connection pool, see async_send_many."""
+    async def _send_many():
+        try:
+            results = await async_send_many(items, concurrency)
+            # Feedback polls run in the background, let them finish before the loop closes
+            tasks = [result for result in results if isinstance(result, asyncio.Task)]
+            await asyncio.gather(*tasks, return_exceptions=True)
+            return [_task_outcome(result) if isinstance(result, asyncio.Task) else result for result in results]
+        finally:
+            await async_close()
+
+    return asyncio.run(_send_many())
+
+async def async_send_many(items, concurrency=8, aiohttp_session=None):
+    """Send many messages concurrently.
+
+    Each item is a dict of keyword arguments for async_send. Results are
+    returned in order, with exceptions returned in place of failed sends.
+    Like async_send, a result is the feedback polling task when an item
+    sets wait_for_feedback=False.
+    Feedback polls don't count against the concurrency limit.
+    """
+    items = list(items)
+    if any('aiohttp_session' in item for item in items):
+        raise ValueError("Items must not set aiohttp_session, pass it to async_send_many instead")
+
+    session = aiohttp_session or await _get_session()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _send_one(item):
+        item = dict(item)
+        wait_for_feedback = item.pop('wait_for_feedback', True)
+
+        # Only the POST counts against concurrency, feedback polls run outside
+        async with semaphore:
+            task = await async_send(aiohttp_session=session, wait_for_feedback=False, **item)
+
+        if wait_for_feedback:
+            return await wait_feedback(task)
+        return task
+
+    return await asyncio.gather(*(_send_one(item) for item in items), return_exceptions=True)
+
+def _task_outcome(task):
+    """Return the exception of a finished task, or None if it succeeded."""
+    if task.cancelled():
+        return asyncio.CancelledError()
+    return task.exception()
+
+async def wait_feedback(task):
+    """Wait until the feedback callback of an async_send call has run.
+
+    For tasks returned by async_send(..., wait_for_feedback=False).
+    """
+    if task is not None:
+        return await task
+
+def _response_json(response):
+    """Decode a requests response body, failing like response.json() does."""
+    try:
+        return _loads(response.content)
+    except json.JSONDecodeError as e:
+        raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos)
 
 def _handle_response(response, actions, actions_encrypted, feedback_callback, feedback_callback_timeout, ignore_connection_errors):
     """Raise error if message was not successfully sent."""
-    if response.json()['status'] == 'BadRequest' and response.json()['message'] == 'Title or message too long':
+    json_response = _response_json(response)
+
+    if json_response['status'] == 'BadRequest' and json_response.get('message') == 'Title or message too long':
         raise BadRequest
 
-    if response.json()['status'] != 'OK':
+    if json_response['status'] != 'OK':
         raise UnknownError
 
-    if 'feedbackId' in response.json() and feedback_callback is not None:
-        feedback_id = response.json()['feedbackId']
+    if 'feedbackId' in json_response and feedback_callback is not None:
+        feedback_id = json_response['feedbackId']
         _query_feedback_endpoint(feedback_id, actions, actions_encrypted, feedback_callback, feedback_callback_timeout, ignore_connection_errors)
 
     response.raise_for_status()
 
-async def _async_handle_response(json_response, actions, actions_encrypted, feedback_callback, feedback_callback_timeout, ignore_connection_errors, aiohttp_session):
+async def _async_handle_response(json_response, actions, actions_encrypted, feedback_callback, feedback_callback_timeout, ignore_connection_errors, aiohttp_session, wait_for_feedback=True):
     """Raise error if message was not successfully sent."""
-    if json_response['status'] == 'BadRequest' and json_response['message'] == 'Title or message too long':
+    if json_response['status'] == 'BadRequest' and json_response.get('message') == 'Title or message too long':
         raise BadRequest
 
     if json_response['status'] != 'OK':
@@ -105,46 +295,60 @@ async def _async_handle_response(json_response, actions, actions_encrypted, feed
 
     if 'feedbackId' in json_response and feedback_callback is not None:
         feedback_id = json_response['feedbackId']
-        await _async_query_feedback_endpoint(feedback_id, actions, actions_encrypted, feedback_callback, feedback_callback_timeout, ignore_connection_errors, aiohttp_session)
+        if wait_for_feedback:
+            await _async_query_feedback_endpoint(feedback_id, actions, actions_encrypted, feedback_callback, feedback_callback_timeout, ignore_connection_errors, aiohttp_session)
+            return None
+
+        task = asyncio.create_task(_async_query_feedback_in_background(feedback_id, actions, actions_encrypted, feedback_callback, feedback_callback_timeout, ignore_connection_errors))
+        # The event loop only keeps weak references to tasks
+        _feedback_tasks.add(task)
+        task.add_done_callback(_feedback_task_done)
+        return task
+
+def _feedback_task_done(task):
+    """Forget a finished feedback task."""
+    _feedback_tasks.discard(task)
+    if not task.cancelled():
+        # Mark the exception as retrieved so unawaited tasks don't log it,
+        # awaiting the task still raises it
+        task.exception()
+
+async def _async_query_feedback_in_background(feedback_id, actions, actions_encrypted, callback, timeout, ignore_connection_errors):
+    # A caller's session may be closed before the poll ends, use our own
+    session = await _get_session()
+    await _async_query_feedback_endpoint(feedback_id, actions, actions_encrypted, callback, timeout, ignore_connection_errors, session)
 
 def _generate_payload(key, title, message, attachments=None, event=None, actions=None, password=None, salt=None):
     """Generator for the payload."""
-    payload = {'key': key}
     actions_encrypted = None
 
     if not password:
-        payload.update({'msg': message})
+        payload = {'key': key, 'msg': message}
 
         if title:
-            payload.update({'title': title})
+            payload['title'] = title
 
         if event:
-            payload.update({'event': event})
+            payload['event'] = event
 
         if actions:
-            payload.update({'actions': actions})
+            payload['actions'] = actions
 
         if attachments:
-            payload.update({'attachments': attachments})
+            payload['attachments'] = attachments
     else:
+        _check_aes_acceleration()
         encryption_key = _generate_encryption_key(password, salt)
         iv = _generate_iv()
-        iv_hex = ""
-        for c_idx in range(len(iv)):
-            iv_hex += "{:02x}".format(ord(iv[c_idx:c_idx+1]))
-        iv_hex = iv_hex.upper()
+        iv_hex = iv.hex().upper()
 
-        payload.update({'encrypted': 'true', 'iv': iv_hex})
+        payload = {'key': key, 'encrypted': 'true', 'iv': iv_hex, 'msg': _encrypt(encryption_key, iv, message)}
 
         if title:
-            title = _encrypt(encryption_key, iv, title)
-            payload.update({'title': title})
+            payload['title'] = _encrypt(encryption_key, iv, title)
 
         if event:
-            payload.update({'event': event})
-
-        message = _encrypt(encryption_key, iv, message)
-        payload.update({'msg': message})
+            payload['event'] = event
 
         if actions:
             actions_encrypted = []
@@ -156,7 +360,7 @@ def _generate_payload(key, title, message, attachments=None, event=None, actions
                     # GET Action
                     actions_encrypted.append({'name' : _encrypt(encryption_key, iv, action['name']), 'url' : _encrypt(encryption_key, iv, action['url'])})
 
-            payload.update({'actions': actions_encrypted})
+            payload['actions'] = actions_encrypted
 
         if attachments:
             attachments_encrypted = []
@@ -166,90 +370,163 @@ def _generate_payload(key, title, message, attachments=None, event=None, actions
                 elif isinstance(attachment, str):
                     attachments_encrypted.append(_encrypt(encryption_key, iv, attachment))
 
-            payload.update({'attachments': attachments_encrypted})
+            payload['attachments'] = attachments_encrypted
 
     return payload, actions, actions_encrypted
 
 
 def _generate_iv():
-    """Generator for the initialization vector."""
-    return os.urandom(algorithms.AES.block_size // 8)
+    """Generator for the initialization vector, returned as bytes."""
+    return os.urandom(_AES_BLOCK_BYTES)
 
 
+@functools.lru_cache(maxsize=128)
 def _generate_encryption_key(password, salt=None):
     """Create the encryption key."""
-    if salt:
-        salted_password = password + salt
-    else:
-        # Compatibility for older versions
-        salted_password = password + SALT
-    hex_str = hashlib.sha1(salted_password.encode('utf-8')).hexdigest()[0:32]
-    byte_str = bytearray.fromhex(hex_str)
-    return bytes(byte_str)
+    # Fall back to the default salt for compatibility with older versions
+    return hashlib.sha1((password + (salt or SALT)).encode('utf-8')).digest()[:16]
+
+
+@functools.lru_cache(maxsize=32)
+def _aes_algorithm(encryption_key):
+    """Return a reusable AES algorithm object for the encryption key."""
+    return algorithms.AES(encryption_key)
 
 
 def _encrypt(encryption_key, iv, data):
     """Encrypt the payload."""
-    padder = padding.PKCS7(algorithms.AES.block_size).padder()
-    data = padder.update(data.encode()) + padder.finalize()
-
-    encryptor = Cipher(algorithms.AES(encryption_key), modes.CBC(iv), default_backend()).encryptor()
-    return base64.urlsafe_b64encode(encryptor.update(data) + encryptor.finalize()).decode('ascii')
+    assert isinstance(iv, (bytes, bytearray))
+    # PKCS7 pad in place so plaintext and ciphertext each live in one buffer
+    padded = bytearray(data.encode())
+    pad = _AES_BLOCK_BYTES - len(padded) % _AES_BLOCK_BYTES
+    padded.extend(bytes((pad,)) * pad)
+
+    encryptor = Cipher(_aes_algorithm(encryption_key), modes.CBC(iv), _BACKEND).encryptor()
+    ciphertext = bytearray(len(padded) + _AES_BLOCK_BYTES - 1)
+    del ciphertext[encryptor.update_into(padded, ciphertext):]
+    ciphertext += encryptor.finalize()
+    return base64.urlsafe_b64encode(ciphertext).decode('ascii')
+
+
+@functools.lru_cache(maxsize=None)
+def _check_aes_acceleration():
+    """Warn once if AES runs without hardware acceleration."""
+    accelerated = _cpu_has_aes()
+    if accelerated is None:
+        # Hardware AES pipelines CTR blocks but not chained CBC encryption,
+        # software AES runs both at a similar speed
+        accelerated = _aes_probe(modes.CBC) / _aes_probe(modes.CTR) > _AES_PROBE_RATIO
+
+    if not accelerated:
+        warnings.warn("AES-NI not detected (" + _BACKEND.openssl_version_text() + "); encryption will be slower", RuntimeWarning)
+
+    return accelerated
+
+
+def _cpu_has_aes():
+    """Return whether the CPU flags list AES instructions, None if unknown."""
+    try:
+        with open('/proc/cpuinfo') as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith(('flags', 'Features')):
+                    return 'aes' in line.split(':', 1)[1].split()
+    except OSError:
+        pass
+    return None
+
+
+def _aes_probe(mode):
+    """Return the best of three timings for encrypting the probe data."""
+    data = bytes(_AES_PROBE_SIZE)
+    algorithm = algorithms.AES(bytes(_AES_BLOCK_BYTES))
+    elapsed = None
+
+    for _ in range(3):
+        start = time.perf_counter()
+        encryptor = Cipher(algorithm, mode(bytes(_AES_BLOCK_BYTES)), _BACKEND).encryptor()
+        encryptor.update(data)
+        encryptor.finalize()
+        run = time.perf_counter() - start
+        elapsed = run if elapsed is None else min(elapsed, run)
+
+    return elapsed
 
 
 def _check_actions(actions):
     """Raise error if actions can't be parsed"""
-    if not isinstance(actions, list) and actions is not None:
+    if actions is None:
+        return
+
+    if not isinstance(actions, list):
         raise ValueError("Actions malformed")
 
-    if isinstance(actions, list) and len(actions) > 0:
-        if isinstance(actions[0], str):
-            if not all(isinstance(el, str) for el in actions):
-                raise ValueError("Feedback actions malformed")
-        else:
-            if not all('name' in el.keys() and 'url' in el.keys() for el in actions):
-                raise ValueError("Get actions malformed")
+    if not actions:
+        return
+
+    if isinstance(actions[0], str):
+        if not all(isinstance(el, str) for el in actions):
+            raise ValueError("Feedback actions malformed")
+    elif not all(isinstance(el, dict) and 'name' in el and 'url' in el for el in actions):
+        raise ValueError("Get actions malformed")
 
 def _check_attachments(attachments):
     if not isinstance(attachments, list) and attachments is not None:
         raise ValueError("Attachments malformed")
 
+def _feedback_poll_delay(n, retry_after, start=None, timeout=None):
+    """Return the seconds to wait before the next feedback poll."""
+    delay = None
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            pass
+        else:
+            # Ignore negative, NaN and infinite hints, bound huge ones
+            if math.isfinite(delay) and delay >= 0:
+                delay = min(delay, _FEEDBACK_RETRY_AFTER_MAX)
+            else:
+                delay = None
+
+    if delay is None:
+        delay = min(_FEEDBACK_POLL_CAP, _FEEDBACK_POLL_BASE * 2 ** min(n, 3)) + random.uniform(0, _FEEDBACK_POLL_JITTER)
+
+    if timeout:
+        # Never sleep past the deadline so the last poll lands right on it
+        delay = min(delay, max(0, start + timeout - time.monotonic()))
+
+    return delay
+
 def _query_feedback_endpoint(feedback_id, actions, actions_encrypted, callback, timeout, ignore_connection_errors):
+    url = _FEEDBACK_URL_FMT.format(feedback_id)
     stop = False
     n = 0
-    start = time.time()
+    start = time.monotonic()
 
     while not stop:
         try:
-            resp = requests.get(SIMPLEPUSH_URL + '/1/feedback/' + feedback_id)
-            json = resp.json()
-            if resp.ok and json['success']:
-                if json['action_selected']:
+            resp = _SESSION.get(url, timeout=_timeout())
+            json_response = _response_json(resp)
+            if resp.ok and json_response['success']:
+                if json_response['action_selected']:
                     stop = True
 
                     if actions_encrypted is None:
-                        callback(json['action_selected'], json['action_selected_at'], json['action_delivered_at'], feedback_id)
+                        callback(json_response['action_selected'], json_response['action_selected_at'], json_response['action_delivered_at'], feedback_id)
                     else:
-                        encrypted_action_selected = json['action_selected']
+                        encrypted_action_selected = json_response['action_selected']
                         idx = actions_encrypted.index(encrypted_action_selected)
                         action_selected = actions[idx]
-                        callback(action_selected, json['action_selected_at'], json['action_delivered_at'], feedback_id)
+                        callback(action_selected, json_response['action_selected_at'], json_response['action_delivered_at'], feedback_id)
                 else:
                     if timeout:
-                        now = time.time()
-                        if now > start + timeout:
+                        now = time.monotonic()
+                        if now >= start + timeout:
                             stop = True
                             raise FeedbackActionTimeout("Feedback Action ID: " + feedback_id)
 
-                    if n < 60:
-                        # In the first minute query every second
-                        time.sleep(1)
-                    elif n < 260:
-                        # In the ten minutes after the first minute query every two seconds
-                        time.sleep(2)
-                    else:
-                        # After 11 minutes query every three seconds
-                        time.sleep(3)
+                    time.sleep(_feedback_poll_delay(n, resp.headers.get('Retry-After'), start, timeout))
+                    n += 1
             else:
                 if not ignore_connection_errors:
                     stop = True
@@ -264,47 +541,45 @@ def _query_feedback_endpoint(feedback_id, actions, actions_encrypted, callback,
                 time.sleep(5)
 
 async def _async_query_feedback_endpoint(feedback_id, actions, actions_encrypted, callback, timeout, ignore_connection_errors, aiohttp_session):
+    poll = _async_poll_feedback(feedback_id, actions, actions_encrypted, callback, ignore_connection_errors, aiohttp_session)
+    if not timeout:
+        return await poll
+
+    try:
+        # Let the event loop enforce the deadline, including on in-flight requests
+        await asyncio.wait_for(poll, timeout=timeout)
+    except asyncio.TimeoutError:
+        raise FeedbackActionTimeout("Feedback Action ID: " + feedback_id)
+
+async def _async_poll_feedback(feedback_id, actions, actions_encrypted, callback, ignore_connection_errors, aiohttp_session):
+    url = _FEEDBACK_URL_FMT.format(feedback_id)
     stop = False
     n = 0
-    start = time.time()
 
     while not stop:
         try:
-            async with aiohttp_session.get(SIMPLEPUSH_URL + '/1/feedback/' + feedback_id) as resp:
-                json = await resp.json()
-                if resp.ok and json['success']:
-                    if json['action_selected']:
+            async with aiohttp_session.get(url) as resp:
+                json_response = _loads(await resp.read())
+                if resp.ok and json_response['success']:
+                    if json_response['action_selected']:
                         stop = True
 
                         if actions_encrypted is None:
-                            callback(json['action_selected'], json['action_selected_at'], json['action_delivered_at'], feedback_id)
+                            callback(json_response['action_selected'], json_response['action_selected_at'], json_response['action_delivered_at'], feedback_id)
                         else:
-                            encrypted_action_selected = json['action_selected']
+                            encrypted_action_selected = json_response['action_selected']
                             idx = actions_encrypted.index(encrypted_action_selected)
                             action_selected = actions[idx]
-                            callback(action_selected, json['action_selected_at'], json['action_delivered_at'], feedback_id)
+                            callback(action_selected, json_response['action_selected_at'], json_response['action_delivered_at'], feedback_id)
                     else:
-                        if timeout:
-                            now = time.time()
-                            if now > start + timeout:
-                                stop = True
-                                raise FeedbackActionTimeout("Feedback Action ID: " + feedback_id)
-
-                        if n < 60:
-                            # In the first minute query every second
-                            await asyncio.sleep(1)
-                        elif n < 260:
-                            # In the ten minutes after the first minute query every two seconds
-                            await asyncio.sleep(2)
-                        else:
-                            # After 11 minutes query every three seconds
-                            await asyncio.sleep(3)
+                        await asyncio.sleep(_feedback_poll_delay(n, resp.headers.get('Retry-After')))
+                        n += 1
                 else:
                     if not ignore_connection_errors:
                         stop = True
                         raise FeedbackActionError("Failed to reach feedback API.")
                     else:
-                        time.sleep(5)
+                        await asyncio.sleep(5)
         except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
             if not ignore_connection_errors:
                 stop = True